@@ -1,7 +1,9 @@
 #!/usr/bin/env bash
 set -euo pipefail
 
-GRAPHQL_QUERY='query($owner: String!, $repo: String!, $pr: Int!) { repository(owner: $owner, name: $repo) { pullRequest(number: $pr) { reviews(first: 100) { nodes { id databaseId author { login } body reactions(first: 100) { nodes { user { login } content } } } } reviewThreads(first: 100) { nodes { id isResolved comments(first: 1) { nodes { author { login } path line body } } } } } } }'
+GRAPHQL_QUERY='query($owner: String!, $repo: String!, $pr: Int!) { viewer { login } repository(owner: $owner, name: $repo) { pullRequest(number: $pr) { reviews(first: 100) { nodes { id author { login } body reactions(first: 100, content: THUMBS_UP) { nodes { user { login } content } } } } reviewThreads(first: 100) { nodes { id isResolved comments(first: 1) { nodes { author { login } path line body } } } } } } }'
+GRAPHQL_MAX_ATTEMPTS=5
+RETRY_MAX_DELAY=300
 
 die() {
     echo "Error: $1" >&2
@@ -21,72 +23,75 @@ get_pr_number() {
     echo "$pr_number"
 }
 
-get_repo_info() {
-    gh repo view --json owner,name 2>&1 || die "Failed to get repository info"
+is_retryable_error() {
+    local output="${1,,}"
+    [[ "$output" == *"rate limit"* ]] || [[ "$output" == *"abuse"* ]] || [[ "$output" =~ http\ (429|5[0-9][0-9]) ]]
 }
 
-get_current_user() {
-    gh api user -q '.login' 2>&1 | tr -d '\r' || die "Failed to get current user"
+# Waits for the rate limit reset once the GraphQL quota is used up, otherwise backs off exponentially
+retry_delay() {
+    local attempt="$1" reset delay=0
+    reset=$(gh api rate_limit --jq '.resources.graphql | select(.remaining == 0) | .reset' 2>/dev/null) || reset=""
+    if [[ "$reset" =~ ^[0-9]+$ ]]; then
+        delay=$((reset - $(date +%s) + 1))
+    fi
+    [[ $delay -gt 0 ]] || delay=$(((1 << attempt) + RANDOM % 2))
+    [[ $delay -le $RETRY_MAX_DELAY ]] || delay=$RETRY_MAX_DELAY
+    echo "$delay"
 }
 
 run_graphql() {
-    local owner="$1" repo="$2" pr="$3"
-    gh api graphql -F "owner=$owner" -F "repo=$repo" -F "pr=$pr" -f "query=$GRAPHQL_QUERY" 2>&1 || die "GraphQL query failed"
+    local pr="$1" output attempt delay
+    for ((attempt = 1; ; attempt++)); do
+        output=$(gh api graphql -F "owner={owner}" -F "repo={repo}" -F "pr=$pr" -f "query=$GRAPHQL_QUERY" 2>&1) && break
+        if [[ $attempt -ge $GRAPHQL_MAX_ATTEMPTS ]] || ! is_retryable_error "$output"; then
+            die "GraphQL query failed: $output"
+        fi
+        delay=$(retry_delay "$attempt")
+        echo "GitHub API request failed, retrying in ${delay}s..." >&2
+        sleep "$delay"
+    done
+    echo "$output"
 }
 
-print_thread() {
-    local thread="$1" is_first="$2"
-
-    [[ "$is_first" == "false" ]] && { echo ""; echo "---"; echo ""; }
-
-    echo "## $(echo "$thread" | jq -r '.comments.nodes[0].path // "unknown"'):$(echo "$thread" | jq -r '.comments.nodes[0].line // "?"')"
-    echo ""
-    echo "**Thread ID:** \`$(echo "$thread" | jq -r '.id')\`"
-    echo "**Author:** $(echo "$thread" | jq -r '.comments.nodes[0].author.login // "unknown"')"
-    echo ""
-    echo "$thread" | jq -r '.comments.nodes[0].body // ""'
+print_threads() {
+    local comments="$1"
+    echo "$comments" | jq -r '[.threads[] | .comments.nodes[0] as $c
+        | "## \($c.path // "unknown"):\($c.line // "?")\n\n**Thread ID:** `\(.id)`\n**Author:** \($c.author.login // "unknown")\n\n\($c.body // "")"
+    ] | join("\n\n---\n\n")'
 }
 
-print_review() {
-    local review="$1" is_first="$2"
-
-    [[ "$is_first" == "false" ]] && { echo ""; echo "---"; echo ""; }
-
-    echo "**Review ID:** \`$(echo "$review" | jq -r '.id')\`"
-    echo "**Author:** $(echo "$review" | jq -r '.author // "unknown"')"
-    echo ""
-    echo "$review" | jq -r '.body // ""'
+print_reviews() {
+    local comments="$1"
+    echo "$comments" | jq -r '[.reviews[]
+        | "**Review ID:** `\(.id)`\n**Author:** \(.author // "unknown")\n\n\(.body // "")"
+    ] | join("\n\n---\n\n")'
 }
 
 main() {
     check_dependencies
 
-    local repo_info owner repo pr_number current_user
-    repo_info=$(get_repo_info)
-    owner=$(echo "$repo_info" | jq -r '.owner.login' | tr -d '\r')
-    repo=$(echo "$repo_info" | jq -r '.name' | tr -d '\r')
+    local result comments pr_number thread_count review_count
     pr_number=$(get_pr_number)
-    current_user=$(get_current_user)
-
-    local result pr_data
-    result=$(run_graphql "$owner" "$repo" "$pr_number")
-    pr_data=$(echo "$result" | jq '.data.repository.pullRequest')
-
-    local unresolved_threads review_bodies thread_count review_count
-
-    unresolved_threads=$(echo "$pr_data" | jq '[.reviewThreads.nodes[] | select(.isResolved == false and (.comments.nodes | length) > 0)]')
-
-    # Get reviews user hasn't reacted to, strip HTML comments
-    review_bodies=$(echo "$pr_data" | jq --arg user "$current_user" '
-        [.reviews.nodes[]
-            | select(.body != null and .body != "")
-            | select(([.reactions.nodes[] | select(.user.login == $user and .content == "THUMBS_UP")] | length) == 0)
-            | {id: .id, author: .author.login, body: (.body | gsub("<!--.*?-->"; "") | gsub("^\\s+|\\s+$"; ""))}
-            | select(.body != "")
-        ]')
-
-    thread_count=$(echo "$unresolved_threads" | jq 'length')
-    review_count=$(echo "$review_bodies" | jq 'length')
+    result=$(run_graphql "$pr_number")
+
+    # Get unresolved threads and reviews the current user hasn't reacted to, strip HTML comments
+    comments=$(echo "$result" | jq '
+        def strip_html_comments: if contains("<!--") then gsub("<!--[\\s\\S]*?-->"; "") else . end;
+        def has_user_reacted($user): any(.reactions.nodes[]; .user.login == $user and .content == "THUMBS_UP");
+        .data.viewer.login as $user
+        | .data.repository.pullRequest
+        | {
+            threads: [.reviewThreads.nodes[] | select(.isResolved == false and (.comments.nodes | length) > 0)],
+            reviews: [.reviews.nodes[]
+                | select(.body != null and .body != "")
+                | select(has_user_reacted($user) | not)
+                | {id: .id, author: .author.login, body: (.body | strip_html_comments | gsub("^\\s+|\\s+$"; ""))}
+                | select(.body != "")
+            ]
+        }')
+
+    IFS=$' \t\r' read -r thread_count review_count < <(echo "$comments" | jq -r '"\(.threads | length) \(.reviews | length)"')
 
     mkdir -p .reviews
 
@@ -131,11 +136,7 @@ EOF
             echo "# Inline Comments (Unresolved)"
             echo ""
 
-            local is_first=true
-            while IFS= read -r thread; do
-                print_thread "$thread" "$is_first"
-                is_first=false
-            done < <(echo "$unresolved_threads" | jq -c '.[]' | tr -d '\r')
+            print_threads "$comments"
         fi
 
         if [[ "$review_count" -gt 0 ]]; then
@@ -145,11 +146,7 @@ EOF
             echo "# Review Comments (${review_count})"
             echo ""
 
-            local is_first=true
-            while IFS= read -r review; do
-                print_review "$review" "$is_first"
-                is_first=false
-            done < <(echo "$review_bodies" | jq -c '.[]' | tr -d '\r')
+            print_reviews "$comments"
         fi
     } > .reviews/prComments.md
 
@@ -1,13 +1,18 @@
 #!/usr/bin/env bash
-# Usage: ./review-wait.sh [--timeout=600]
+# Usage: ./review-wait.sh [--timeout=600] [--initial-delay=10]
 set -euo pipefail
 
-INITIAL_DELAY=10
-POLL_INTERVAL=15
+DEFAULT_INITIAL_DELAY=10
 DEFAULT_TIMEOUT=600
+BACKOFF_BASE=2
+BACKOFF_MAX=30
+BACKOFF_JITTER=2
+BACKOFF_MAX_ATTEMPT=4
+WATCH_INTERVAL=10
 RUNNING_STATES=(pending in_progress queued waiting requested)
 FAILURE_STATES=(failure error cancelled timed_out startup_failure action_required stale)
 LAST_CHECKS_JSON=""
+DEADLINE=0
 
 die() {
     echo "Error: $1" >&2
@@ -27,14 +32,72 @@ get_pr_number() {
     echo "$pr_number"
 }
 
-# Returns aggregated state with priority: failure > running > success
-# Stores raw JSON in LAST_CHECKS_JSON for reuse by get_failed_checks
-get_ci_state() {
-    local pr_number="$1"
-    LAST_CHECKS_JSON=$(gh pr checks "$pr_number" --json name,state 2>&1) || die "Failed to fetch PR checks: $LAST_CHECKS_JSON"
+die_timeout() {
+    echo ""
+    echo "Timeout after ${TIMEOUT}s"
+    exit 1
+}
+
+is_rate_limited() {
+    local output="${1,,}"
+    [[ "$output" == *"rate limit"* ]] || [[ "$output" == *"http 429"* ]]
+}
+
+# Sleeps until the GraphQL rate limit resets once the quota is used up, otherwise backs off
+# exponentially (e.g. secondary rate limits), never past the deadline
+wait_for_rate_limit() {
+    local attempt="$1" reset delay=0 remaining
+    reset=$(gh api rate_limit --jq '.resources.graphql | select(.remaining == 0) | .reset' 2>/dev/null) || reset=""
+    if [[ "$reset" =~ ^[0-9]+$ ]]; then
+        delay=$((reset - $(date +%s) + 1))
+    fi
+    [[ $delay -gt 0 ]] || delay=$(backoff_delay "$attempt")
+    remaining=$((DEADLINE - SECONDS))
+    [[ $remaining -gt 0 ]] || die_timeout
+    [[ $delay -le $remaining ]] || delay=$remaining
+    echo "GitHub API rate limit hit, retrying in ${delay}s..." >&2
+    sleep "$delay"
+}
+
+# Stores raw JSON in LAST_CHECKS_JSON for reuse by get_ci_state and print_failed_checks
+fetch_checks() {
+    local pr_number="$1" output attempt=0
+    while ! output=$(gh pr checks "$pr_number" --json name,state 2>&1); do
+        is_rate_limited "$output" || die "Failed to fetch PR checks: $output"
+        [[ $SECONDS -lt $DEADLINE ]] || die_timeout
+        wait_for_rate_limit "$attempt"
+        attempt=$((attempt + 1))
+    done
+    LAST_CHECKS_JSON="$output"
+}
+
+# Lets a single long-lived gh process poll the checks until they complete, fail, or the time runs out
+watch_checks() {
+    local pr_number="$1" remaining="$2" watch_pid timer_pid
+    gh pr checks "$pr_number" --watch --fail-fast --interval "$WATCH_INTERVAL" &>/dev/null &
+    watch_pid=$!
+    # The timer runs sleep as its own job so it can take it down when terminated
+    (
+        trap 'kill "${sleep_pid:-}" 2>/dev/null; exit' TERM
+        sleep "$remaining" &
+        sleep_pid=$!
+        wait "$sleep_pid"
+        kill "$watch_pid"
+    ) &>/dev/null &
+    timer_pid=$!
+    # Background jobs ignore SIGINT, so clean them up explicitly if the script is interrupted
+    trap "kill $watch_pid $timer_pid 2>/dev/null" EXIT
+    wait "$watch_pid" 2>/dev/null || true
+    kill "$timer_pid" 2>/dev/null || true
+    wait "$timer_pid" 2>/dev/null || true
+    trap - EXIT
+}
 
+# Returns aggregated state of LAST_CHECKS_JSON with priority: failure > running > success
+get_ci_state() {
     local states
-    states=$(echo "$LAST_CHECKS_JSON" | jq -r '[.[] | .state] | if length == 0 then "" else .[] end' 2>/dev/null | tr -d '\r')
+    states=$(echo "$LAST_CHECKS_JSON" | jq -r '[.[] | .state] | if length == 0 then "" else .[] end' 2>/dev/null)
+    states="${states//$'\r'/}"
 
     [[ -z "$states" ]] && return
 
@@ -87,14 +150,26 @@ failure_states_jq_filter() {
 }
 
 print_failed_checks() {
-    local filter
+    local filter failed
     filter=$(failure_states_jq_filter)
+    failed=$(echo "$LAST_CHECKS_JSON" | jq -r --argjson states "$filter" '.[] | select((.state | ascii_downcase) as $s | $states | index($s)) | "  - " + .name' 2>/dev/null) || true
     echo "CI failed. Failed checks:"
-    echo "$LAST_CHECKS_JSON" | jq -r --argjson states "$filter" '.[] | select((.state | ascii_downcase) as $s | $states | index($s)) | "  - " + .name' 2>/dev/null | tr -d '\r'
+    if [[ -n "$failed" ]]; then
+        echo "${failed//$'\r'/}"
+    fi
+}
+
+backoff_delay() {
+    local attempt="$1" delay
+    [[ $attempt -le $BACKOFF_MAX_ATTEMPT ]] || attempt=$BACKOFF_MAX_ATTEMPT
+    delay=$((BACKOFF_BASE << attempt))
+    [[ $delay -le $BACKOFF_MAX ]] || delay=$BACKOFF_MAX
+    echo $((delay + RANDOM % (BACKOFF_JITTER + 1)))
 }
 
 parse_args() {
     TIMEOUT=$DEFAULT_TIMEOUT
+    INITIAL_DELAY=$DEFAULT_INITIAL_DELAY
     local arg value
     for arg in "$@"; do
         if [[ "$arg" == --timeout=* ]]; then
@@ -104,6 +179,13 @@ parse_args() {
             else
                 echo "Invalid timeout value, using default" >&2
             fi
+        elif [[ "$arg" == --initial-delay=* ]]; then
+            value="${arg#--initial-delay=}"
+            if [[ "$value" =~ ^[0-9]+$ ]]; then
+                INITIAL_DELAY="$value"
+            else
+                echo "Invalid initial delay value, using default" >&2
+            fi
         fi
     done
 }
@@ -112,13 +194,15 @@ main() {
     parse_args "$@"
     check_dependencies
 
-    local pr_number state start_time current_time elapsed
+    local pr_number state previous_checks delay remaining attempt=0
     pr_number=$(get_pr_number)
 
     echo "Waiting ${INITIAL_DELAY}s for CI to start..."
     sleep "$INITIAL_DELAY"
 
-    state=$(get_ci_state "$pr_number")
+    DEADLINE=$((SECONDS + TIMEOUT))
+    fetch_checks "$pr_number"
+    state=$(get_ci_state)
 
     if [[ "$state" == "FAILED" ]]; then
         print_failed_checks
@@ -131,19 +215,16 @@ main() {
     fi
 
     echo "Waiting for CI checks on PR #${pr_number}..."
-    start_time=$(date +%s)
+    [[ $SECONDS -lt $DEADLINE ]] || die_timeout
+    watch_checks "$pr_number" $((DEADLINE - SECONDS))
 
+    # Confirms the final state and keeps polling if the watch ended early (e.g. on an API error)
     while true; do
-        current_time=$(date +%s)
-        elapsed=$((current_time - start_time))
+        [[ $SECONDS -lt $DEADLINE ]] || die_timeout
 
-        if [[ $elapsed -ge $TIMEOUT ]]; then
-            echo ""
-            echo "Timeout after ${TIMEOUT}s"
-            exit 1
-        fi
-
-        state=$(get_ci_state "$pr_number")
+        previous_checks="$LAST_CHECKS_JSON"
+        fetch_checks "$pr_number"
+        state=$(get_ci_state)
 
         if [[ "$state" == "FAILED" ]]; then
             echo ""
@@ -157,8 +238,18 @@ main() {
             exit 0
         fi
 
+        # Poll quickly again whenever a check changes state, back off while nothing moves
+        if [[ "$LAST_CHECKS_JSON" != "$previous_checks" ]]; then
+            attempt=0
+        fi
+        delay=$(backoff_delay "$attempt")
+        attempt=$((attempt + 1))
+        remaining=$((DEADLINE - SECONDS))
+        [[ $remaining -gt 0 ]] || die_timeout
+        [[ $delay -le $remaining ]] || delay=$remaining
+
         printf "."
-        sleep "$POLL_INTERVAL"
+        sleep "$delay"
     done
 }
 
@@ -1,21 +1,21 @@
 from __future__ import annotations
 
+import functools
 import os
 import shutil
 import stat
+import sys
 from enum import StrEnum
 from importlib.resources import files
 from pathlib import Path
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated
 
-import readchar
 import typer
-from rich.console import Console
-from rich.live import Live
-from rich.panel import Panel
-from rich.table import Table
 
-console = Console()
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from rich.panel import Panel
 
 
 class InitMode(StrEnum):
@@ -23,6 +23,22 @@ class InitMode(StrEnum):
     SCRIPT = "script"
 
 
+_SCRIPT_NAMES = ("review-wait.sh", "review-comments.sh")
+
+_TARGET_FILES: dict[InitMode, tuple[str, ...]] = {
+    InitMode.CLAUDE_CODE: (
+        ".claude/skills/reviewloop/SKILL.md",
+        ".claude/skills/reviewloop/scripts/review-wait.sh",
+        ".claude/skills/reviewloop/scripts/review-comments.sh",
+    ),
+    InitMode.SCRIPT: (
+        "scripts/reviewloop/review-wait.sh",
+        "scripts/reviewloop/review-comments.sh",
+        "scripts/reviewloop/reviewPrompt.txt",
+    ),
+}
+
+
 def _templates_path() -> Path:
     source = files("reviewloop_cli.templates")
     path = Path(str(source))
@@ -32,28 +48,28 @@ def _templates_path() -> Path:
     return path
 
 
+@functools.lru_cache(maxsize=1)
+def _read_skill_template(templates: Path) -> str:
+    return (templates / "SKILL.md").read_text(encoding="utf-8")
+
+
 def _strip_frontmatter(content: str) -> str:
-    lines = content.split("\n")
-    if not lines or lines[0].strip() != "---":
+    first_line_end = content.find("\n")
+    if first_line_end == -1 or content[:first_line_end].strip() != "---":
         return content
-    for i, line in enumerate(lines[1:], start=1):
-        if line.strip() == "---":
-            return "\n".join(lines[i + 1 :]).lstrip("\n")
+    close = content.find("\n---", first_line_end)
+    while close != -1:
+        line_end = content.find("\n", close + 4)
+        if line_end == -1:
+            line_end = len(content)
+        if not content[close + 4 : line_end].strip():
+            return content[line_end + 1 :].lstrip("\n")
+        close = content.find("\n---", close + 4)
     return content
 
 
-def _get_target_files(mode: InitMode) -> list[str]:
-    if mode == InitMode.CLAUDE_CODE:
-        return [
-            ".claude/skills/reviewloop/SKILL.md",
-            ".claude/skills/reviewloop/scripts/review-wait.sh",
-            ".claude/skills/reviewloop/scripts/review-comments.sh",
-        ]
-    return [
-        "scripts/reviewloop/review-wait.sh",
-        "scripts/reviewloop/review-comments.sh",
-        "scripts/reviewloop/reviewPrompt.txt",
-    ]
+def _get_target_files(mode: InitMode) -> tuple[str, ...]:
+    return _TARGET_FILES[mode]
 
 
 def _check_existing_files(target_dir: Path, mode: InitMode, force: bool) -> bool:
@@ -69,45 +85,38 @@ def _check_existing_files(target_dir: Path, mode: InitMode, force: bool) -> bool
     return typer.confirm("Overwrite?", default=False)
 
 
-def _make_executable(path: Path) -> None:
-    if os.name == "nt":
-        return
-    current = path.stat().st_mode
-    path.chmod(current | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+def _copy_script(src: Path, dst: Path) -> None:
+    shutil.copyfile(src, dst)
+    if os.name != "nt":
+        dst.chmod(stat.S_IRWXU | stat.S_IRGRP | stat.S_IXGRP | stat.S_IROTH | stat.S_IXOTH)
 
 
 def _copy_scripts(templates: Path, scripts_dir: Path) -> list[str]:
     scripts_dir.mkdir(parents=True, exist_ok=True)
     created: list[str] = []
-    for name in ("review-wait.sh", "review-comments.sh"):
-        src = templates / "scripts" / name
+    for name in _SCRIPT_NAMES:
         dst = scripts_dir / name
-        shutil.copy2(src, dst)
-        _make_executable(dst)
+        _copy_script(templates / "scripts" / name, dst)
         created.append(str(dst))
     return created
 
 
 def _init_claude_code(target_dir: Path, templates: Path) -> list[str]:
     skill_dir = target_dir / ".claude" / "skills" / "reviewloop"
-    scripts_dir = skill_dir / "scripts"
-    skill_dir.mkdir(parents=True, exist_ok=True)
+    scripts = _copy_scripts(templates, skill_dir / "scripts")
 
     skill_src = templates / "SKILL.md"
     skill_dst = skill_dir / "SKILL.md"
     shutil.copy2(skill_src, skill_dst)
 
-    created = [str(skill_dst)]
-    created.extend(_copy_scripts(templates, scripts_dir))
-    return created
+    return [str(skill_dst), *scripts]
 
 
 def _init_script(target_dir: Path, templates: Path) -> list[str]:
     scripts_dir = target_dir / "scripts" / "reviewloop"
     created = _copy_scripts(templates, scripts_dir)
 
-    skill_content = (templates / "SKILL.md").read_text(encoding="utf-8")
-    prompt_content = _strip_frontmatter(skill_content)
+    prompt_content = _strip_frontmatter(_read_skill_template(templates))
     prompt_content = prompt_content.replace(".claude/skills/reviewloop/scripts/", "scripts/reviewloop/")
     prompt_path = scripts_dir / "reviewPrompt.txt"
     prompt_path.write_text(prompt_content, encoding="utf-8")
@@ -116,6 +125,12 @@ def _init_script(target_dir: Path, templates: Path) -> list[str]:
     return created
 
 
+_INITIALIZERS: dict[InitMode, Callable[[Path, Path], list[str]]] = {
+    InitMode.CLAUDE_CODE: _init_claude_code,
+    InitMode.SCRIPT: _init_script,
+}
+
+
 def _print_summary(created_files: list[str], target_dir: Path) -> None:
     print(f"\nInitialized reviewloop in {target_dir}\n")
     print("Created files:")
@@ -124,6 +139,8 @@ def _print_summary(created_files: list[str], target_dir: Path) -> None:
 
 
 def _get_key() -> str:
+    import readchar
+
     key = readchar.readkey()
     if key in (readchar.key.UP, readchar.key.CTRL_P):
         return "up"
@@ -139,6 +156,12 @@ def _get_key() -> str:
 
 
 def _select_with_arrows(options: dict[str, str], title: str, default: str | None = None) -> str:
+    from rich.console import Console
+    from rich.live import Live
+    from rich.panel import Panel
+    from rich.table import Table
+
+    console = Console()
     keys = list(options.keys())
     selected = keys.index(default) if default and default in keys else 0
 
@@ -174,19 +197,37 @@ def _select_with_arrows(options: dict[str, str], title: str, default: str | None
             live.update(_build_panel(), refresh=True)
 
 
+def _select_with_prompt(options: dict[str, str], title: str, default: str | None = None) -> str:
+    keys = list(options.keys())
+    default_choice = keys.index(default) + 1 if default and default in keys else 1
+    print(f"{title}:")
+    for i, key in enumerate(keys, start=1):
+        print(f"  {i}. {key}  ({options[key]})")
+    while True:
+        choice: str = typer.prompt("Select", default=str(default_choice))
+        if choice.isdigit() and 1 <= int(choice) <= len(keys):
+            return keys[int(choice) - 1]
+        print(f"Please enter a number between 1 and {len(keys)}.")
+
+
+def _is_interactive() -> bool:
+    return sys.stdin.isatty() and not os.environ.get("CI")
+
+
 def _prompt_mode() -> InitMode:
     choices = {
         "Claude Code": "installs as a Claude Code skill",
         "Script based": "creates standalone scripts + prompt file",
     }
-    selected = _select_with_arrows(choices, "Initialization mode", default="Claude Code")
+    select = _select_with_arrows if _is_interactive() else _select_with_prompt
+    selected = select(choices, "Initialization mode", default="Claude Code")
     if selected == "Script based":
         return InitMode.SCRIPT
     return InitMode.CLAUDE_CODE
 
 
-def _prompt_target_dir() -> Path:
-    name: str = typer.prompt("Project folder", default=".")
+def _resolve_target_dir(project_name: str | None) -> Path:
+    name: str = typer.prompt("Project folder", default=".") if project_name is None else project_name
     if name == ".":
         return Path.cwd()
     target = Path.cwd() / name
@@ -194,16 +235,6 @@ def _prompt_target_dir() -> Path:
     return target
 
 
-def _resolve_target_dir(project_name: str | None) -> Path:
-    if project_name is None:
-        return _prompt_target_dir()
-    if project_name == ".":
-        return Path.cwd()
-    target = Path.cwd() / project_name
-    target.mkdir(parents=True, exist_ok=True)
-    return target
-
-
 def init(
     project_name: Annotated[
         str | None, typer.Argument(help="Target directory name (defaults to current directory).")
@@ -221,10 +252,6 @@ def init(
         raise typer.Exit(code=1)
 
     templates = _templates_path()
-
-    if mode == InitMode.CLAUDE_CODE:
-        created = _init_claude_code(target_dir, templates)
-    else:
-        created = _init_script(target_dir, templates)
+    created = _INITIALIZERS[mode](target_dir, templates)
 
     _print_summary(created, target_dir)